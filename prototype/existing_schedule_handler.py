@@ -10,12 +10,10 @@ def load_existing_schedule(filepath):
     else:
         raise ValueError("Unsupported file format. Use .csv, .xlsx, or .xls")
 
-    existing_schedule = {}
-    for _, row in df.iterrows():
-        existing_schedule[row['event_name']] = (
-            row['day'], 
-            row['time_slot'], 
-            row['room']
-        )
+    # Built from whole columns instead of iterrows(), which creates a Series per row
+    existing_schedule = dict(zip(
+        df['event_name'],
+        zip(df['day'], df['time_slot'], df['room'])
+    ))
     return existing_schedule
 
@@ -1,8 +1,20 @@
+import functools
+import os
+
 import pandas as pd
 
 
-def load_requests(filepath):
-    """Loads the requests from either CSV or Excel."""
+def _read_raw_requests(filepath):
+    """Reads the raw requests table, using a pickled copy next to the file while it is up to date."""
+    # Keyed on the full file name, so requests.csv and requests.xlsx don't share one cache
+    cache_path = filepath + ".pkl"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(filepath):
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception:
+            # A corrupt or incompatible cache file is ignored, and the source is read again below
+            pass
+
     if filepath.endswith('.csv'):
         requests = pd.read_csv(filepath)
     elif filepath.endswith(('.xlsx', '.xls')):
@@ -10,13 +22,28 @@ def load_requests(filepath):
     else:
         raise ValueError("Unsupported file format. Use .csv, .xlsx, or .xls")
 
-    # Convert days
-    def parse_days(days_str):
-        if days_str == "all":
-            return ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-        return [day.strip().lower() for day in days_str.split(",")]
+    try:
+        requests.to_pickle(cache_path)
+    except OSError:
+        # The cache is optional, e.g. the data directory may be read-only
+        pass
+    return requests
+
+
+@functools.lru_cache(maxsize=1)
+def load_requests(filepath):
+    """Loads the requests from either CSV or Excel.
+    Cached, and returned as a tuple so repeated calls don't re-read and re-process the same file.
+    Every call returns the same record dicts, so treat them as read-only."""
+    requests = _read_raw_requests(filepath)
 
-    requests["days"] = requests["days_of_the_week"].apply(parse_days)
+    # Convert days, with vectorized string ops instead of a Python call per row
+    all_days = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+    days_of_the_week = requests["days_of_the_week"]
+    is_all = days_of_the_week.eq("all")
+    listed_days = days_of_the_week.str.lower().str.replace(" ", "").str.split(",")
+    # A separate list per row, so the "all" rows don't share (and co-mutate) one list
+    requests["days"] = listed_days.where(~is_all, pd.Series([list(all_days) for _ in range(len(requests))], index=requests.index))
 
     # Define time slots
     TIME_SLOTS = {
@@ -26,7 +53,7 @@ def load_requests(filepath):
         "all": ["9-11", "11-1", "1-3", "3-5", "5-7"]
     }
 
-    # Map time slots 
+    # Map time slots
     requests["time_slots"] = (
         requests["pref"]
         .fillna("all")
@@ -34,7 +61,7 @@ def load_requests(filepath):
         .map(TIME_SLOTS)
     )
 
-    # Drop columns 
+    # Drop columns
     requests = requests.drop(columns=["pref", "days_of_the_week"])
 
-    return requests.to_dict("records")
\ No newline at end of file
+    return tuple(requests.to_dict("records"))
\ No newline at end of file
@@ -1,16 +1,37 @@
-from constraint import Problem
+from constraint import Problem, AllDifferentConstraint, InSetConstraint, NotInSetConstraint, OptimizedBacktrackingSolver
 from request_handler import load_requests
 from existing_schedule_handler import load_existing_schedule
+import itertools
+import operator
 import sys
 import time as lib_time
 
 # Define problem
-problem = Problem()
+problem = Problem(OptimizedBacktrackingSolver())
 
 # Get requests and resources
 requests = load_requests("requests.csv")
+request_names = [req["name"] for req in requests]
 all_rooms = ["Room1", "Room2"]
 
+# Include existing scheduling
+existing_schedule = load_existing_schedule("existing_schedule.csv")
+
+# Encode every (day, time, room) slot as an int id, so comparing two slots is one int compare instead of three string compares.
+# The grid covers every day, time and room in the requests and existing bookings (in first-seen order), so no slot is lost.
+TIMES = ["9-11", "11-1", "1-3", "3-5", "5-7", "7-9"]
+DAYS = list(dict.fromkeys(
+    [day for req in requests for day in req["days"]] + [day for day, _, _ in existing_schedule.values()]
+))
+GRID_TIMES = list(dict.fromkeys(TIMES + [time for _, time, _ in existing_schedule.values()]))
+GRID_ROOMS = list(dict.fromkeys(all_rooms + [room for _, _, room in existing_schedule.values()]))
+# Rank of each time slot (earlier is better), looked up instead of scanning TIMES with .index()
+TIME_ORDER = {time: rank for rank, time in enumerate(GRID_TIMES)}
+SLOTS = list(itertools.product(DAYS, GRID_TIMES, GRID_ROOMS))
+SLOT_ID = {slot: slot_id for slot_id, slot in enumerate(SLOTS)}
+# Rank of each slot's time, indexed by slot id
+SLOT_TIME_INDEX = [TIME_ORDER[time] for _, time, _ in SLOTS]
+
 # Add variables with prioritized time slots
 for req in requests:
     valid_slots = []
@@ -18,46 +39,57 @@ for req in requests:
     
     # Sort time slots by preference 
     for day in days:
-        for time in sorted(req["time_slots"], key=lambda x: ["9-11", "11-1", "1-3", "3-5", "5-7", "7-9"].index(x)):
+        for time in sorted(req["time_slots"], key=TIME_ORDER.get):
             for room in all_rooms:
-                valid_slots.append((day, time, room))
-    
+                valid_slots.append(SLOT_ID[(day, time, room)])
+
+    # python-constraint tries domain values from the end, so put the earliest times last to reach good solutions first
+    valid_slots.sort(key=lambda slot_id: SLOT_TIME_INDEX[slot_id], reverse=True)
     problem.addVariable(req["name"], valid_slots)
 
 # Add constraints
-def no_overlap(a, b):
-    return a[2] != b[2] or a[0] != b[0] or a[1] != b[1]
-
-for req1 in requests:
-    for req2 in requests:
-        if req1["name"] != req2["name"]:
-            problem.addConstraint(no_overlap, [req1["name"], req2["name"]])
+# Two requests overlap only if day, time and room are all equal, i.e. they have the same slot id.
+# One built-in constraint over all requests instead of a Python function per pair, with the names passed as variables so any request name works.
+problem.addConstraint(AllDifferentConstraint(), request_names)
 
 # Optimization with flexible stopping
+# Pulls every request's slot out of a solution in one C-level call (itemgetter returns a bare value for a single name)
+get_request_slots = operator.itemgetter(*request_names) if len(request_names) > 1 else lambda solution: (solution[request_names[0]],)
+rank_of_slot = SLOT_TIME_INDEX.__getitem__
+
 def evaluate_solution(solution):
-    return sum(["9-11", "11-1", "1-3", "3-5", "5-7", "7-9"].index(slot[1]) 
-               for req in requests 
-               for slot in [solution[req["name"]]])
+    return sum(map(rank_of_slot, get_request_slots(solution)))
+
+# No solution can score lower than every request getting its earliest time, so reaching it proves the optimum
+min_possible_score = sum(min(TIME_ORDER[time] for time in req["time_slots"]) for req in requests)
     
-# Include existing scheduling
-existing_schedule = load_existing_schedule("existing_schedule.csv")
 print(existing_schedule)
 # Add constraints for existing bookings
 for req_name, (day, time, room) in existing_schedule.items():
     # If this is one of our requests, fix its value
-    if req_name in [r["name"] for r in requests]:
-        problem.addConstraint(
-            lambda val, d=day, t=time, r=room: val == (d, t, r),
-            [req_name]
-        )
+    if req_name in request_names:
+        problem.addConstraint(InSetConstraint({SLOT_ID[(day, time, room)]}), [req_name])
     else:
         # Otherwise, prevent others from using this slot
         for req in requests:
             if req["name"] != req_name:
-                problem.addConstraint(
-                    lambda val, d=day, t=time, r=room: val != (d, t, r),
-                    [req["name"]]
-                )
+                problem.addConstraint(NotInSetConstraint({SLOT_ID[(day, time, room)]}), [req["name"]])
+
+# Break room symmetry: if the existing bookings take the same (day, time) slots in every room and none of
+# our requests is pinned to a room, swapping rooms turns any schedule into another one with the same score.
+# Pinning one request to the first room then drops those mirrored schedules from the search.
+booked_times_by_room = {room: set() for room in all_rooms}
+for req_name, (day, time, room) in existing_schedule.items():
+    if room in booked_times_by_room:
+        booked_times_by_room[room].add((day, time))
+rooms_interchangeable = (
+    request_names
+    and not any(req_name in request_names for req_name in existing_schedule)
+    and all(booked_times == booked_times_by_room[all_rooms[0]] for booked_times in booked_times_by_room.values())
+)
+if rooms_interchangeable:
+    first_room_slots = [SLOT_ID[slot] for slot in SLOTS if slot[2] == all_rooms[0]]
+    problem.addConstraint(InSetConstraint(first_room_slots), [min(request_names)])
 
 best_solution = None
 best_score = sys.maxsize
@@ -74,6 +106,11 @@ for solution in problem.getSolutionIter():
         best_solution = solution
         best_score = current_score
         print(f"New best: {best_score} (after {solutions_checked} solutions)")
+
+    # Stop if no better schedule can exist
+    if best_score == min_possible_score:
+        print(f"Optimal schedule found after {solutions_checked} solutions")
+        break
     
     # Stop if we've taken too long
     if lib_time.time() - start_time > max_time:
@@ -87,7 +124,7 @@ for solution in problem.getSolutionIter():
 if best_solution:
     print("\nBest Schedule Found:")
     for req in requests:
-        day, time, room = best_solution[req["name"]]
+        day, time, room = SLOTS[best_solution[req["name"]]]
         print(f"{req['name']:10} | {day:3} {time:5} | {room}")
     print(f"\nTotal 'earliness' score: {best_score}")
 else:
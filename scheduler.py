@@ -1,293 +1,481 @@
-from constraint import Problem, AllDifferentConstraint
+from constraint import Problem, AllDifferentConstraint, OptimizedBacktrackingSolver
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import time
+import bisect
+import functools
+import heapq
+import itertools
+
+# Place pools each strategy allows, in preference order, keyed by (strategy_level, requested_place_type, needs_pc).
+# Combinations that are missing get no places under that strategy and are left to a later one.
+DOMAIN_TABLE = {
+    # Strategy 1: PC desks only
+    (1, 'pc_desk', True): ('pc_desks',),
+    (1, 'unknown', True): ('pc_desks',),
+    # Without a PC, only a specifically requested lower floor desk; flexible requests wait for strategy 2/3
+    (1, 'lower_floor', False): ('requested',),
+    # Strategy 2: PC desks + lower floor
+    (2, 'pc_desk', True): ('pc_desks',),
+    (2, 'lower_floor', True): ('lower_floor_desks',),
+    (2, 'unknown', True): ('pc_desks',), # Flexible requests that need a PC only ever get PC desks
+    (2, 'lower_floor', False): ('lower_floor_desks', 'pc_desks'), # Non-PC first, then PC if needed
+    (2, 'unknown', False): ('lower_floor_desks', 'pc_desks'),
+    (2, 'pc_desk', False): ('pc_desks',), # Asked for a PC desk without needing a PC, still allow it
+    # Strategy 3: all places (PC desks + lower floor + rooms)
+    (3, 'pc_desk', True): ('pc_desks',),
+    (3, 'lower_floor', True): ('lower_floor_desks', 'pc_desks', 'rooms'), # Lower floor preferred, but can go to others
+    (3, 'room', True): ('rooms',),
+    (3, 'unknown', True): ('pc_desks',),
+    (3, 'pc_desk', False): ('pc_desks',), # Still allow PC if specifically requested
+    (3, 'lower_floor', False): ('lower_floor_desks', 'rooms', 'pc_desks'), # Prefer non-PC first
+    (3, 'unknown', False): ('lower_floor_desks', 'rooms', 'pc_desks'),
+    (3, 'room', False): ('rooms',),
+}
+
+
+class MinimumRemainingValuesSolver(OptimizedBacktrackingSolver):
+    """
+    Forward-checking backtracking solver that tries the variables with the fewest places first.
+    The default order puts the most constrained variables first, which leaves the reservations that can only go to
+    a handful of places (a room, a requested desk, a domain pruned by fixed reservations) deep in the search tree,
+    so a clique with more reservations than places is only noticed after trying every order of everything above it.
+    """
+
+    def getSortedVariables(self, domains, vconstraints):
+        # Fewest places first, the number of constraints only breaks ties
+        return sorted(domains, key=lambda variable: (len(domains[variable]), -len(vconstraints[variable])))
+
 
 class Scheduler:
     def __init__(self, reservations_data, places_config):
         self.reservations_data = reservations_data
         # Store original reservation details keyed by ID for easy lookup
         self._reservations_by_id = {res['id']: res for res in reservations_data}
+        # (start, end) datetimes of every reservation, parsed once and reused for every strategy and the fallback
+        self._datetimes_by_id = {
+            res['id']: (self._parse_time_slot(res['day'], res['start_time']), self._parse_time_slot(res['day'], res['end_time']))
+            for res in reservations_data
+        }
+        # (start, end) of every reservation in minutes, computed once so the constraint-building loops
+        # don't go back through the reservation dicts and time strings for every strategy
+        self._minutes_by_id = {
+            res['id']: (self._time_minutes(res['day'], res['start_time']), self._time_minutes(res['day'], res['end_time']))
+            for res in reservations_data
+        }
         self.places_config = places_config
+        # Type of every configured place, looked up by _get_place_type
+        self._place_type = {}
+        for place_id in places_config['coworking_pc_desks']:
+            self._place_type[place_id] = 'pc_desk'
+        for place_id in places_config['lower_floor_desks']:
+            self._place_type[place_id] = 'lower_floor'
+        for room in ('room_1', 'room_2', 'room_3'):
+            self._place_type[places_config[room]['id']] = 'room'
+        # The place pools DOMAIN_TABLE refers to
+        place_pools = {
+            'pc_desks': places_config['coworking_pc_desks'],
+            'lower_floor_desks': places_config['lower_floor_desks'],
+            'rooms': [places_config['room_1']['id'], places_config['room_2']['id'], places_config['room_3']['id']],
+        }
+        # Ordered place ids of every DOMAIN_TABLE entry, so domains aren't concatenated again for every reservation.
+        # The 'requested' entries depend on the reservation and are left out.
+        self._domain_tables = {
+            key: tuple(place_id for pool_name in pool_names for place_id in place_pools[pool_name])
+            for key, pool_names in DOMAIN_TABLE.items() if 'requested' not in pool_names
+        }
+        # Split the reservations once instead of on every strategy attempt: accepted/formation reservations are fixed,
+        # pending ones are left to the scheduler and rejected ones are ignored
+        self._fixed_ids = []
+        pending_reservation = []
+        for reservation in reservations_data:
+            if reservation['request_status'] == 'accepted' or reservation['formation_id']:
+                self._fixed_ids.append(reservation['id'])
+            elif reservation['request_status'] == 'pending':
+                pending_reservation.append(reservation)
+        self._pending_ids = [reservation['id'] for reservation in pending_reservation]
+        # (requested place type, needs_pc) of every pending reservation, the part of its DOMAIN_TABLE key
+        # that is the same under every strategy
+        self._pending_profiles = {
+            # needPc defaults to True if not specified; only its truthiness counts, as it's part of a dict key
+            reservation['id']: (self._get_place_type(reservation['place_id']), bool(reservation.get('needPc', True)))
+            for reservation in pending_reservation
+        }
+        # _find_overlaps results by frozenset of warm start items, see _create_scheduling_problem_with_strategy
+        self._overlaps_by_warm_start = {}
         # Helper to store scheduled assignments (includes auto-approved and CSP-solved)
         self.scheduled_assignments = {}
 
-    def _parse_time_slot(self, day_str, time_str):
-        """Converts day and time strings to a datetime object for easier comparison."""
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _parse_time_slot(day_str, time_str):
+        """Converts day and time strings to a datetime object for easier comparison.
+        Cached, since the same (day, time) pairs are parsed over and over while building constraints."""
         return datetime.strptime(f"{day_str} {time_str}", "%Y-%m-%d %H:%M")
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _time_minutes(day_str, time_str):
+        """Converts day and time strings to whole minutes since 1970-01-01, so overlap checks compare plain ints."""
+        return (Scheduler._parse_time_slot(day_str, time_str) - datetime(1970, 1, 1)) // timedelta(minutes=1)
+
     def _do_times_overlap(self, start1, end1, start2, end2):
-        """Checks if two time periods overlap."""
-        return max(start1, start2) < min(end1, end2)
+        """Checks if two time periods, in minutes (see _time_minutes), overlap."""
+        return start1 < end2 and start2 < end1
+
+    def _overlapping_pairs(self, intervals1, intervals2):
+        """
+        Returns the (key1, key2) pairs, one (start, end, key) interval from each list, whose times overlap.
+        Sweeps both lists together in start order and only compares an interval against the still active
+        intervals of the other list, so pairs within the same list are never looked at.
+        """
+        pairs = []
+        # Active intervals of each list as heaps of (end, order, key), see _overlap_cliques
+        active1 = []
+        active2 = []
+        events = [(start, end, key, True) for start, end, key in intervals1] + \
+                 [(start, end, key, False) for start, end, key in intervals2]
+        for order, (start, end, key, is_first) in enumerate(sorted(events, key=lambda event: event[0])):
+            # Drop the intervals that ended before this one starts
+            while active1 and active1[0][0] <= start:
+                heapq.heappop(active1)
+            while active2 and active2[0][0] <= start:
+                heapq.heappop(active2)
+            if is_first:
+                pairs.extend((key, other_key) for _, _, other_key in active2)
+                heapq.heappush(active1, (end, order, key))
+            else:
+                pairs.extend((other_key, key) for _, _, other_key in active1)
+                heapq.heappush(active2, (end, order, key))
+        return pairs
+
+    def _overlap_cliques(self, intervals):
+        """
+        Returns the keys of every maximal group of (start, end, key) intervals that all overlap each other.
+        Sweeping in start order, the active intervals form such a group right before one of them ends.
+        """
+        cliques = []
+        # Active intervals as a heap of (end, order, key), so the ones that ended are popped
+        # without rescanning the whole active set for every interval
+        active = []
+        for order, (start, end, key) in enumerate(sorted(intervals, key=lambda interval: interval[0])):
+            if active and active[0][0] <= start:
+                if len(active) > 1:
+                    cliques.append([active_key for _, _, active_key in active])
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+            heapq.heappush(active, (end, order, key))
+        if len(active) > 1:
+            cliques.append([active_key for _, _, active_key in active])
+        return cliques
+
+    def _busy_index(self, schedule):
+        """
+        Indexes a {res_id: details} schedule by (day, place_id) into lists of (start, end) minutes sorted by start.
+        Overlapping intervals of the same place are merged, so the intervals of a list never overlap each other.
+        """
+        busy = {}
+        for res_id, details in schedule.items():
+            key = (self._reservations_by_id[res_id]['day'], details['place_id'])
+            busy.setdefault(key, []).append(self._minutes_by_id[res_id])
+        for key, intervals in busy.items():
+            intervals.sort()
+            merged = [intervals[0]]
+            for start, end in intervals[1:]:
+                if start < merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            busy[key] = merged
+        return busy
+
+    def _is_place_free(self, busy_intervals, start, end):
+        """
+        Checks a (start, end) period against the sorted, non-overlapping busy intervals of one place.
+        Only the last interval starting before the period ends can overlap it, so one bisect is enough.
+        """
+        i = bisect.bisect_left(busy_intervals, (end,))
+        return i == 0 or not self._do_times_overlap(start, end, *busy_intervals[i - 1])
+
+    def _find_free_place(self, busy, day, candidate_places, start, end):
+        """Returns the first of candidate_places that is free on day during (start, end) in the busy index, or None."""
+        for place_id in candidate_places:
+            if self._is_place_free(busy.get((day, place_id), ()), start, end):
+                return place_id
+        return None
+
+    def _greedy_assignment(self, intervals, domains_by_res, partial=False):
+        """
+        Sweeps the (start, end, res_id) intervals in start order and gives each reservation the first place
+        of its domain that no active reservation holds, freeing places as their reservations end.
+        Returns the assignment in the same {variable: place} form as a CSP solution, or None as soon as
+        a reservation finds every place of its domain taken, since the domains then need a real search.
+        With partial=True, such reservations (and those without a domain) are skipped instead.
+        """
+        solution = {}
+        # Places held by the active reservations, as a heap of (end, place) plus a set for membership tests
+        occupied = []
+        occupied_places = set()
+        for start, end, res_id in sorted(intervals, key=lambda interval: interval[0]):
+            while occupied and occupied[0][0] <= start:
+                occupied_places.discard(heapq.heappop(occupied)[1])
+            place_id = next((place for place in domains_by_res.get(res_id, ()) if place not in occupied_places), None)
+            if place_id is None:
+                if partial:
+                    continue
+                return None
+            heapq.heappush(occupied, (end, place_id))
+            occupied_places.add(place_id)
+            solution[self._var_by_res_id[res_id]] = place_id
+        return solution
 
     def _get_place_type(self, place_id):
         """Helper to categorize place IDs, handling None for flexible requests."""
         if place_id is None:
             return 'unknown' # Represents a flexible request without a specified place type
-        elif 1 <= place_id <= 24:
-            return 'pc_desk'
-        elif 26 <= place_id <= 45:  # Updated for individual lower floor desks
-            return 'lower_floor'
-        elif place_id in [101, 102, 103]:
-            return 'room'
-        return 'unknown' # Fallback for any other unexpected place_id
-
-    def _create_scheduling_problem_with_strategy(self, strategy_level):
+        return self._place_type.get(place_id, 'unknown') # Fallback for any other unexpected place_id
+
+    def _fixed_assignments(self):
+        """Returns a new schedule with only the accepted/formation reservations, at their own places."""
+        return {
+            res_id: {
+                'place_id': self._reservations_by_id[res_id]['place_id'],
+                'start_time': self._datetimes_by_id[res_id][0],
+                'end_time': self._datetimes_by_id[res_id][1],
+                'status': 'accepted'
+            }
+            for res_id in self._fixed_ids
+        }
+
+    def _find_overlaps(self, pending_reservation_ids):
+        """
+        Finds the time overlaps of the pending reservations, with the fixed ones in scheduled_assignments.
+        Returns the (start, end, res_id) intervals of the pending reservations, the places each one cannot take
+        because an overlapping fixed reservation holds them, and the groups of mutually overlapping pending reservations.
+        """
+        # (start, end, key) of every pending and fixed reservation in minutes, used to find time overlaps
+        pending_intervals = [(*self._minutes_by_id[res_id], res_id) for res_id in pending_reservation_ids]
+        fixed_intervals = [(*self._minutes_by_id[fixed_res_id], fixed_res_id) for fixed_res_id in self.scheduled_assignments]
+
+        # A pending reservation cannot take a place held by a fixed reservation it overlaps with.
+        # Those places are known up front, so they are removed from the domain instead of checked by a constraint.
+        blocked_places = {res_id: set() for res_id in pending_reservation_ids}
+        for res_id, fixed_res_id in self._overlapping_pairs(pending_intervals, fixed_intervals):
+            blocked_places[res_id].add(self.scheduled_assignments[fixed_res_id]['place_id'])
+
+        return pending_intervals, blocked_places, self._overlap_cliques(pending_intervals)
+
+    def _create_scheduling_problem_with_strategy(self, strategy_level, warm_start=None):
         """
         Creates and configures the CSP problem based on the given strategy level.
         Strategy levels define which places are available for assignment.
+        Pending reservations in warm_start ({res_id: place_id}, placed by an earlier strategy)
+        are kept at those places like accepted ones, so only the rest are left to the problem.
         """
-        problem = Problem()
+        warm_start = warm_start or {}
+        problem = Problem(MinimumRemainingValuesSolver(forwardcheck=True))
         # Reset scheduled_assignments for each attempt to only include fixed ones
         # and then add solutions from CSP.
-        self.scheduled_assignments = {}
+        # First, add all accepted/formation reservations to scheduled_assignments
+        self.scheduled_assignments = self._fixed_assignments()
 
-        coworking_pc_desks = self.places_config['coworking_pc_desks']
-        lower_floor_desks = self.places_config['lower_floor_desks'] 
-        room_ids = [self.places_config['room_1']['id'], self.places_config['room_2']['id'], self.places_config['room_3']['id']]
-
-        # Separate available places by type for easier filtering
-        all_pc_desks = set(coworking_pc_desks)
-        all_non_pc_desks = set(lower_floor_desks).union(set(room_ids)) # Lower floor desks and rooms are non-PC
-
-       # First, add all accepted/formation reservations to scheduled_assignments
         pending_reservation_ids = []
-        pending_reservation = []
-        for reservation in self.reservations_data:
-            res_id = reservation['id']
-            formation_id = reservation['formation_id']
-            request_status = reservation['request_status']
-
-            if request_status == 'accepted' or formation_id:
-                start_dt = self._parse_time_slot(reservation['day'], reservation['start_time'])
-                end_dt = self._parse_time_slot(reservation['day'], reservation['end_time'])
+        for res_id in self._pending_ids:
+            if res_id in warm_start:
+                start_dt, end_dt = self._datetimes_by_id[res_id]
                 self.scheduled_assignments[res_id] = {
-                    'place_id': reservation['place_id'],
+                    'place_id': warm_start[res_id],
                     'start_time': start_dt,
                     'end_time': end_dt,
                     'status': 'accepted'
                 }
-            elif request_status == 'pending':
-                pending_reservation.append(reservation)
-            # Rejected reservations are ignored by the scheduler
+            else:
+                pending_reservation_ids.append(res_id)
+
+        # CSP variable name of every pending reservation, and the way back from a variable to its reservation,
+        # so variables are never looked up through problem internals or parsed back out of their names
+        self._pending_vars = [(res_id, f'res_{res_id}_place') for res_id in pending_reservation_ids]
+        self._var_by_res_id = dict(self._pending_vars)
+        self._var_to_res_id = {var_name: res_id for res_id, var_name in self._pending_vars}
 
-        # Sort by needPC to prioritize reservations that need a pc desk so fallback assignment can assign them correctly.
-        pending_reservation.sort(key=lambda x: not x.get('needs_pc', False))
+        # Strategies only differ in the domains; the time overlaps only depend on which reservations are fixed,
+        # so they are found once per warm start and shared by every strategy built on it
+        overlaps_key = frozenset(warm_start.items())
+        if overlaps_key not in self._overlaps_by_warm_start:
+            self._overlaps_by_warm_start[overlaps_key] = self._find_overlaps(pending_reservation_ids)
+        pending_intervals, blocked_places, cliques = self._overlaps_by_warm_start[overlaps_key]
 
-        for reservation in pending_reservation:
-            pending_reservation_ids.append(reservation['id'])
-      
         # Now, define variables and constraints for pending reservations
+        domains_by_res = {}
         for res_id in pending_reservation_ids:
             original_res = self._reservations_by_id[res_id]
             
             # Determine the domain of available places based on strategy and original request
-            possible_places_for_this_res = []
-            requested_place_type = self._get_place_type(original_res['place_id'])
-            needs_pc = original_res.get('needPc', True) # Default to True if not specified
-
-            if strategy_level == 1: # Prioritize PC Desks
-                if needs_pc:
-                    # Only PC desks
-                    if requested_place_type == 'pc_desk' or requested_place_type == 'unknown':
-                        possible_places_for_this_res = list(coworking_pc_desks)
-                else: # Does NOT need PC
-                    # Only non-PC desks (if explicitly requested lower_floor or unknown, try to give non-PC)
-                    if requested_place_type == 'lower_floor' or requested_place_type == 'unknown':
-                        # For Strategy 1, if no PC is needed, only PC desks are considered by default.
-                        # This means if 'unknown' and no PC, it might not find a place here,
-                        # which is fine as it will go to strategy 2/3.
-                        # If a specific lower_floor desk was requested, allow it.
-                        if original_res['place_id'] in lower_floor_desks:
-                             possible_places_for_this_res = [original_res['place_id']]
-                        # Otherwise, Strategy 1, not needing PC, for general requests will struggle.
-                        # This behavior aligns with Strategy 1's strictness.
-            elif strategy_level == 2: # PC Desks + Lower Floor
-                if needs_pc:
-                    # PC desks. If requested lower floor or unknown, try PC first then lower floor
-                    if requested_place_type == 'pc_desk':
-                        possible_places_for_this_res = list(coworking_pc_desks) # PC first for 'unknown'
-                    elif requested_place_type == 'lower_floor':
-                        possible_places_for_this_res = list(lower_floor_desks)
-                    elif requested_place_type == 'unknown':
-                        possible_places_for_this_res == list(lower_floor_desks) + list(coworking_pc_desks)
-                else: # Does NOT need PC
-                    # Prefer non-PC desks if flexible, or if lower floor requested
-                    if requested_place_type == 'lower_floor' or requested_place_type == 'unknown':
-                        possible_places_for_this_res = list(lower_floor_desks) + list(coworking_pc_desks) # Non-PC first, then PC if needed
-                    elif requested_place_type == 'pc_desk': # If they specifically asked for a PC desk but don't need PC, still allow it
-                        possible_places_for_this_res = list(coworking_pc_desks)
-
-            elif strategy_level == 3: # All Places (PC Desks + Lower Floor + Rooms)
-                if needs_pc:
-                    # Prioritize PC desks, then lower floor, then rooms for flexible requests
-                    if requested_place_type == 'pc_desk' :
-                        possible_places_for_this_res = list(coworking_pc_desks) 
-                    elif requested_place_type == 'lower_floor':
-                        possible_places_for_this_res = list(lower_floor_desks) + list(coworking_pc_desks) + list(room_ids) # Lower floor preferred, but can go to others
-                    elif requested_place_type == 'room':
-                        possible_places_for_this_res = list(room_ids)  # Room preferred
-                    elif requested_place_type == 'unknown':
-                         possible_places_for_this_res = list(coworking_pc_desks) + list(lower_floor_desks) + list(room_ids)
-                else: # Does NOT need PC
-                    # Prioritize non-PC desks (lower floor, rooms), then PC desks if no other options
-                    if requested_place_type == 'pc_desk':
-                        possible_places_for_this_res = list(coworking_pc_desks) # Still allow PC if specifically requested
-                    elif requested_place_type == 'lower_floor' or requested_place_type == 'unknown':
-                        possible_places_for_this_res = list(lower_floor_desks) + list(room_ids) + list(coworking_pc_desks) # Prefer non-PC first
-                    elif requested_place_type == 'room':
-                        possible_places_for_this_res = list(room_ids) # Room preferred
-            
-            # Filter out places that are of the wrong type for 'needs_pc' IF the original request was flexible (place_id is None)
-            # If a specific place was requested (e.g., place_id=5 for PC, or place_id=30 for non-PC), we respect that,
-            # regardless of 'needs_pc', as it's a hard constraint from the user.
-            if original_res['place_id'] is None: # Only apply 'needsPc' preference for flexible requests
-                if needs_pc:
-                    possible_places_for_this_res = [p for p in possible_places_for_this_res if p in all_pc_desks ] # Needs PC, so remove non-PC only if it makes sense for the strategy
-                    # Refinement: If needs_pc, only allow PC desks in strategy 1. For strategy 2/3 allow other if PC is full
-                    if needs_pc:
-                        if strategy_level == 1:
-                            possible_places_for_this_res = [p for p in possible_places_for_this_res if p in all_pc_desks]
-                        elif strategy_level in [2,3]:
-                            # For non-PC needs, we prioritize non-PC desks. We let flexible requests try all.
-                            # The filtering for 'needs_pc' and 'place_type' should already handle this.
-                            pass # The logic above already attempts to prioritize/exclude based on strategy and needPc
-                else: # Does NOT need PC
-                    # Strictly prefer non-PC desks. Only fall back to PC desks if no non-PC available within the strategy.
-                    # This means we should order `possible_places_for_this_res` to put non-PC desks first.
-                    # The logic above already sets this order.
-                    pass
+            requested_place_type, needs_pc = self._pending_profiles[res_id]
+            domain_key = (strategy_level, requested_place_type, needs_pc)
 
+            if DOMAIN_TABLE.get(domain_key) == ('requested',):
+                # Only the lower floor desk this reservation asked for
+                possible_places_for_this_res = [original_res['place_id']]
+            else:
+                possible_places_for_this_res = list(self._domain_tables.get(domain_key, ()))
+
+            possible_places_for_this_res = [p for p in possible_places_for_this_res if p not in blocked_places[res_id]]
 
             # Ensure the domain is not empty for pending variables
             if not possible_places_for_this_res:
                 print(f"Warning: No possible places for res_id {res_id} under strategy {strategy_level}.")
                 continue
 
-            problem.addVariable(f'res_{res_id}_place', possible_places_for_this_res)
-
-            # Constraint: A pending reservation cannot conflict with an already scheduled (fixed) reservation
-            def create_fixed_conflict_constraint(current_res_id, fixed_res_details):
-                current_start_dt = self._parse_time_slot(self._reservations_by_id[current_res_id]['day'], self._reservations_by_id[current_res_id]['start_time'])
-                current_end_dt = self._parse_time_slot(self._reservations_by_id[current_res_id]['day'], self._reservations_by_id[current_res_id]['end_time'])
+            domains_by_res[res_id] = possible_places_for_this_res
 
-                fixed_place_id = fixed_res_details['place_id']
-                fixed_start_dt = fixed_res_details['start_time']
-                fixed_end_dt = fixed_res_details['end_time']
+        # Kept for the greedy passes in solve(), also when this strategy cannot place every reservation
+        self.pending_intervals = pending_intervals
+        self.domains_by_res = domains_by_res
 
-                return lambda assigned_place: \
-                    not (assigned_place == fixed_place_id and
-                         self._do_times_overlap(current_start_dt, current_end_dt, fixed_start_dt, fixed_end_dt))
+        for res_id, _ in self._pending_vars:
+            if res_id not in domains_by_res:
+                return None # This strategy cannot schedule all pending reservations
 
-            for fixed_res_id, fixed_details in self.scheduled_assignments.items():
-                problem.addConstraint(
-                    create_fixed_conflict_constraint(res_id, fixed_details),
-                    (f'res_{res_id}_place',)
-                )
+        # Hall's condition on every group of mutually overlapping reservations: the ones whose places all lie within
+        # some set of places cannot outnumber it. The domains already leave out places held by fixed reservations,
+        # so a group that fails this has no solution under this strategy and the search can be skipped.
+        for clique in cliques:
+            clique_domains = [frozenset(domains_by_res[res_id]) for res_id in clique]
+            for places in set(clique_domains):
+                demand = sum(1 for domain in clique_domains if domain <= places)
+                if demand > len(places):
+                    print(f"Warning: {demand} overlapping reservations share only {len(places)} places under strategy {strategy_level}.")
+                    return None
+
+        # Pending reservations with the same times and the same domain are interchangeable: swapping their places
+        # gives another valid solution. Requiring their places in domain preference order keeps only one of those
+        # permutations, so the search doesn't re-explore the same dead ends once per permutation.
+        interchangeable_groups = {}
+        for start, end, res_id in pending_intervals:
+            group_key = (start, end, tuple(domains_by_res[res_id]))
+            interchangeable_groups.setdefault(group_key, []).append(res_id)
+
+        for (_, _, domain), group in interchangeable_groups.items():
+            if len(group) > len(domain):
+                print(f"Warning: {len(group)} reservations with the same times share only {len(domain)} places under strategy {strategy_level}.")
+                return None # More interchangeable reservations than places for them
+            # With the places in preference order, the i-th member of the group can only take one of the
+            # places from the i-th to the (i + len(domain) - len(group))-th, the others are left to the rest
+            for i, res_id in enumerate(group):
+                # python-constraint tries domain values from the end, so reverse the list to try preferred places first
+                problem.addVariable(self._var_by_res_id[res_id], domain[i:len(domain) - len(group) + i + 1][::-1])
 
         # Constraint: No two *pending* reservations can occupy the same place at the same time.
-        actual_pending_var_names_in_problem = [var for var in problem._variables if var.startswith('res_') and var.endswith('_place')]
-
-        for i, var_name1 in enumerate(actual_pending_var_names_in_problem):
-            res_id1 = int(var_name1.split('_')[1])
-            for var_name2 in actual_pending_var_names_in_problem[i+1:]:
-                res_id2 = int(var_name2.split('_')[1])
-
-                res1_start_dt = self._parse_time_slot(self._reservations_by_id[res_id1]['day'], self._reservations_by_id[res_id1]['start_time'])
-                res1_end_dt = self._parse_time_slot(self._reservations_by_id[res_id1]['day'], self._reservations_by_id[res_id1]['end_time'])
-
-                res2_start_dt = self._parse_time_slot(self._reservations_by_id[res_id2]['day'], self._reservations_by_id[res_id2]['start_time'])
-                res2_end_dt = self._parse_time_slot(self._reservations_by_id[res_id2]['day'], self._reservations_by_id[res_id2]['end_time'])
-
+        # Every overlapping pair belongs to a group of mutually overlapping reservations,
+        # so one AllDifferentConstraint per group replaces the pairwise lambdas.
+        for clique in cliques:
+            problem.addConstraint(
+                AllDifferentConstraint(),
+                [self._var_by_res_id[res_id] for res_id in clique]
+            )
+
+        for (_, _, domain), group in interchangeable_groups.items():
+            rank = {place_id: i for i, place_id in enumerate(domain)}
+            # Posted on every pair, not as one n-ary constraint, so each check and forward check happens
+            # as soon as two members are assigned, and all members keep the same constraint count.
+            for res_id1, res_id2 in itertools.combinations(group, 2):
                 problem.addConstraint(
-                    lambda place1, place2:
-                        not (place1 == place2 and self._do_times_overlap(res1_start_dt, res1_end_dt, res2_start_dt, res2_end_dt)),
-                    (var_name1, var_name2)
+                    lambda place1, place2, rank=rank: rank[place1] < rank[place2],
+                    (self._var_by_res_id[res_id1], self._var_by_res_id[res_id2])
                 )
-        
-        for res_id in pending_reservation_ids:
-            if f'res_{res_id}_place' not in problem._variables:
-                return None # This strategy cannot schedule all pending reservations
-
 
         return problem
 
     def solve(self):
+        self.scheduled_assignments.update(self._fixed_assignments())
         # Store initial pending reservation IDs for fallback
-        initial_pending_ids = []
-        pending_reservation = []
-        for reservation in self.reservations_data:
-            res_id = reservation['id']
-            formation_id = reservation['formation_id']
-            request_status = reservation['request_status']
-
-            if request_status == 'accepted' or formation_id:
-                start_dt = self._parse_time_slot(reservation['day'], reservation['start_time'])
-                end_dt = self._parse_time_slot(reservation['day'], reservation['end_time'])
-                self.scheduled_assignments[res_id] = {
-                    'place_id': reservation['place_id'],
-                    'start_time': start_dt,
-                    'end_time': end_dt,
-                    'status': 'accepted'
-                }
-            elif request_status == 'pending':
-                pending_reservation.append(reservation)
-            # Rejected reservations are ignored by the scheduler
-
-        # Sort by needPC to prioritize reservations that need a pc desk so fallback assignment can assign them correctly.
-        pending_reservation.sort(key=lambda x: not x.get('needs_pc', False))
+        initial_pending_ids = list(self._pending_ids)
 
-        for reservation in pending_reservation:
-            initial_pending_ids.append(reservation['id'])
-        
         # Attempt CSP strategies
+        # Places found by the earlier strategies for part of the pending reservations
+        warm_start = {}
         for strategy_level in range(1, 4):
             print(f"\nAttempting scheduling with Strategy {strategy_level}...")
-            self.problem = self._create_scheduling_problem_with_strategy(strategy_level)
-            if self.problem:
-                found_solution = None
-                start_time = time.time() # Start timer for this strategy
-                time_limit = 5 # Time limit for all strategies in this version
-                
-                try:
-                    # Use getSolutionIter for all strategies to find the first solution quickly
-                    for solution in self.problem.getSolutionIter() and (time.time() - start_time) <= time_limit :
-                        found_solution = solution
-                        # Break as soon as the first solution is found
-                        break 
-                        
-                except Exception as e:
-                    print(f"  An error occurred during Strategy {strategy_level} solving: {e}")
-                    found_solution = None # No solution due to error
-
-                # Check time limit specifically for Strategy 3 *after* attempting to find a solution
-                
-                if not found_solution and (time.time() - start_time) >= time_limit:
-                    print(f"  Strategy {strategy_level} timed out after {time_limit} seconds without finding a solution.")
-                    found_solution = None # Ensure it's explicitly None if it timed out
-
-                if found_solution:
-                    print(f"Solution found with Strategy {strategy_level}.")
-                    return self._process_solution(found_solution)
-                else:
-                    print(f"No comprehensive solution found with Strategy {strategy_level}.")
-            else:
-                print(f"Problem setup failed for Strategy {strategy_level} (some pending reservations had no valid place options for this strategy).")
+            found_solution = None
+            if warm_start:
+                # Only solve the reservations the earlier strategies left over, with this strategy's wider domains
+                print(f"  Keeping the places of {len(warm_start)} reservations from the previous strategy.")
+                found_solution = self._solve_with_strategy(strategy_level, warm_start)
+                if found_solution is None:
+                    # The kept places may be what blocks the rest, so try again with every reservation free
+                    print(f"  Retrying Strategy {strategy_level} without the kept places.")
+                    warm_start = {}
+            if found_solution is None:
+                found_solution = self._solve_with_strategy(strategy_level)
+
+            if found_solution is not None:
+                print(f"Solution found with Strategy {strategy_level}.")
+                return self._process_solution(found_solution)
             print(f"Finished evaluating Strategy {strategy_level} results.")
 
+            # Keep what this strategy could place for the next one
+            partial_solution = self._greedy_assignment(self.pending_intervals, self.domains_by_res, partial=True)
+            warm_start.update((self._var_to_res_id[var_name], place_id) for var_name, place_id in partial_solution.items())
+
         # Fallback: If no CSP strategy finds a full solution
         print("\nNo comprehensive solution found for all pending reservations via CSP. Attempting assignment fallback...")
         return self._attempt_assignment_fallback(initial_pending_ids)
 
 
+    def _solve_with_strategy(self, strategy_level, warm_start=None):
+        """Builds the problem for one strategy level and returns its solution, or None if it has none."""
+        self.problem = self._create_scheduling_problem_with_strategy(strategy_level, warm_start)
+        if not self.problem:
+            print(f"Problem setup failed for Strategy {strategy_level} (no schedule of all pending reservations is possible under this strategy, see the warnings above).")
+            return None
+
+        # The search has no time limit: getSolution cannot be interrupted once it runs
+        found_solution = None
+        try:
+            # Overlapping reservations just need distinct places, so a greedy sweep usually finds
+            # an assignment right away; the backtracking search is only needed when it gets stuck.
+            found_solution = self._greedy_assignment(self.pending_intervals, self.domains_by_res)
+            if found_solution is None:
+                # Only one solution is needed, getSolution stops at the first satisfying assignment
+                found_solution = self.problem.getSolution()
+
+        except Exception as e:
+            print(f"  An error occurred during Strategy {strategy_level} solving: {e}")
+            found_solution = None # No solution due to error
+
+        if found_solution is None:
+            print(f"No comprehensive solution found with Strategy {strategy_level}.")
+        return found_solution
+
+    def solve_by_day(self, max_workers=None):
+        """
+        Solves each day as its own scheduling problem, in parallel worker processes.
+        Reservations on different days never overlap, so the per-day problems are independent
+        and each is much smaller than the combined one.
+        """
+        reservations_by_day = {}
+        for reservation in self.reservations_data:
+            reservations_by_day.setdefault(reservation['day'], []).append(reservation)
+
+        day_schedulers = [Scheduler(day_reservations, self.places_config) for day_reservations in reservations_by_day.values()]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            day_solutions = list(pool.map(_solve_day, day_schedulers))
+
+        # Merge the per-day schedules
+        self.scheduled_assignments = {}
+        for day_solution in day_solutions:
+            self.scheduled_assignments.update(day_solution)
+        return self.scheduled_assignments
+
     def _process_solution(self, solution):
         """Processes a found solution and updates scheduled_assignments."""
         for var_name, assigned_place_id in solution.items():
-            res_id = int(var_name.split('_')[1])
-            original_res = self._reservations_by_id[res_id]
+            res_id = self._var_to_res_id[var_name]
+            start_dt, end_dt = self._datetimes_by_id[res_id]
             self.scheduled_assignments[res_id] = {
                 'place_id': assigned_place_id,
-                'start_time': self._parse_time_slot(original_res['day'], original_res['start_time']),
-                'end_time': self._parse_time_slot(original_res['day'], original_res['end_time']), 
+                'start_time': start_dt,
+                'end_time': end_dt,
                 'status': 'accepted'
             }
         return self.scheduled_assignments
@@ -302,6 +490,12 @@ class Scheduler:
 
         # Identify pending reservations that still need to be scheduled
         unscheduled_pending_ids = [res_id for res_id in initial_pending_ids if res_id not in current_schedule]
+        # First fit in start order: each reservation only competes with the ones already placed before it starts,
+        # which packs the places tighter than taking them in request order.
+        # Among reservations starting together, the ones that need a PC desk go first so they can still get one.
+        unscheduled_pending_ids.sort(
+            key=lambda res_id: (self._minutes_by_id[res_id][0], not self._reservations_by_id[res_id].get('needPc', True))
+        )
         
         
         coworking_pc_desks = self.places_config['coworking_pc_desks']
@@ -310,54 +504,41 @@ class Scheduler:
         
         all_possible_places = list(coworking_pc_desks) + list(lower_floor_desks) + list(room_ids)
 
+        # Busy periods of every (day, place_id), so a candidate place is checked with a bisect
+        # instead of a scan over the whole schedule
+        busy = self._busy_index(current_schedule)
+
+        # Candidate places in preference order, the same for every reservation with the same needPc (without duplicates)
+        # If PC is needed, prioritize PC desks
+        pc_candidate_places = list(dict.fromkeys(coworking_pc_desks))
+        # Does NOT need PC: prioritize non-PC desks, then PC desks as a last resort
+        non_pc_candidate_places = list(dict.fromkeys(list(lower_floor_desks) + list(room_ids) + list(coworking_pc_desks)))
+
         for res_id in unscheduled_pending_ids:
             original_res = self._reservations_by_id[res_id]
-            res_start_dt = self._parse_time_slot(original_res['day'], original_res['start_time'])
-            res_end_dt = self._parse_time_slot(original_res['day'], original_res['end_time'])
+            res_start_dt, res_end_dt = self._datetimes_by_id[res_id]
+            res_start, res_end = self._minutes_by_id[res_id]
             needs_pc = original_res.get('needPc', True)
 
             # Determine preferred places based on original request, falling back to all if flexible
             requested_place_type = self._get_place_type(original_res['place_id'])
             
-            candidate_places = []
-
             # Prioritize based on 'needPc'
-            if needs_pc:
-                # If PC is needed, prioritize PC desks
-                candidate_places = list(coworking_pc_desks)
-                
-            else: # Does NOT need PC
-                # Prioritize non-PC desks, then PC desks as a last resort
-                candidate_places = list(lower_floor_desks) + list(room_ids) + list(coworking_pc_desks)
-               
-            # Ensure no duplicates 
-            candidate_places = list(dict.fromkeys(candidate_places)) 
-            
-
-
-            assigned = False
-            for place_id_candidate in candidate_places:
-                is_available = True
-                # Check for conflicts with already scheduled reservations
-                for sch_res_id, sch_details in current_schedule.items():
-                    if sch_details['place_id'] == place_id_candidate and \
-                       self._do_times_overlap(res_start_dt, res_end_dt, sch_details['start_time'], sch_details['end_time']):
-                        is_available = False
-                        break # Conflict found, this place is not available
-
-                if is_available:
-                    # Assign the place
-                    current_schedule[res_id] = {
-                        'place_id': place_id_candidate,
-                        'start_time': res_start_dt,
-                        'end_time': res_end_dt,
-                        'status': 'accepted' # Indicate it was assigned via fallback
-                    }
-                    assigned = True
-                    print(f"  Fallback assigned Reservation ID {res_id} to Place {place_id_candidate}.")
-                    break # Move to the next unscheduled reservation
-
-            if not assigned:
+            candidate_places = pc_candidate_places if needs_pc else non_pc_candidate_places
+
+            # Check for conflicts with already scheduled reservations
+            place_id = self._find_free_place(busy, original_res['day'], candidate_places, res_start, res_end)
+            if place_id is not None:
+                bisect.insort(busy.setdefault((original_res['day'], place_id), []), (res_start, res_end))
+                # Assign the place
+                current_schedule[res_id] = {
+                    'place_id': place_id,
+                    'start_time': res_start_dt,
+                    'end_time': res_end_dt,
+                    'status': 'accepted' # Indicate it was assigned via fallback
+                }
+                print(f"  Fallback assigned Reservation ID {res_id} to Place {place_id}.")
+            else:
                 print(f"  Could not assign Reservation ID {res_id} even with  fallback (no available place found).")
                 # Optionally, you might add it to current_schedule with a 'rejected' or 'unassigned' status
                 # current_schedule[res_id] = {'status': 'unassigned'} # Or similar
@@ -366,6 +547,11 @@ class Scheduler:
         return self.scheduled_assignments
 
 
+def _solve_day(day_scheduler):
+    """Runs one per-day Scheduler; module-level so ProcessPoolExecutor can pickle it."""
+    return day_scheduler.solve()
+
+
 fallback_test=[]
 for i in range (1,26):
     fallback_test.append({'id': 50+i, 'user_id': 150+i, 'place_id': 26, 'formation_id': None, 'day': '2025-08-01', 'start_time': '09:00', 'end_time': '12:00', 'request_status': 'pending', 'needPc': True})
@@ -418,7 +604,7 @@ places_config = {
 
 if __name__ == "__main__":
     scheduler = Scheduler(dummy_reservations_data, places_config)
-    solution = scheduler.solve()
+    solution = scheduler.solve_by_day()
 
     if solution:
         print("\n--- Final Scheduled Reservations ---")